@@ -6,6 +6,11 @@ import os
 import subprocess
 from pathlib import Path
 
+from file_cache import file_cached
+
+# Claude CLI runner, replaced in tests like solve._run
+_run = subprocess.run
+
 # Global state for tracking
 node_count = 0
 seen_tasks = set()
@@ -26,6 +31,8 @@ def extract_name(task_file: str) -> str:
 def is_complex(file_path: str) -> bool:
     """Check if a task file is marked as complex
     
+    Results are cached with file_cache.file_cached.
+    
     Args:
         file_path: Path to the .md file
         
@@ -33,30 +40,35 @@ def is_complex(file_path: str) -> bool:
         True if the file contains '## Type' section with 'complex'
     """
     try:
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Look for ## Type section
-        lines = content.split('\n')
+        return _read_is_complex(file_path)
+    except OSError as e:
+        print(f"Error reading {file_path}: {e}")
+        return False
+
+
+@file_cached
+def _read_is_complex(file_path: str) -> bool:
+    """Read the Type section of file_path"""
+    # Binary mode: the markers are ASCII, so lines never need decoding
+    with open(file_path, 'rb') as f:
+        # Look for ## Type section, reading only as far as needed
         in_type_section = False
         
-        for line in lines:
-            if line.strip() == '## Type':
+        for line in f:
+            if line.strip() == b'## Type':
                 in_type_section = True
                 continue
             if in_type_section:
-                if line.strip().startswith('#'):
+                if line.lstrip().startswith(b'#'):
                     # Reached next section
                     break
-                if 'complex' in line.lower():
+                line = line.lower()
+                if b'complex' in line:
                     return True
-                if 'simple' in line.lower():
+                if b'simple' in line:
                     return False
-        
-        return False
-    except Exception as e:
-        print(f"Error reading {file_path}: {e}")
-        return False
+    
+    return False
 
 
 def decompose_prompt(task_file: str) -> str:
@@ -116,7 +128,7 @@ def agent(prompt: str, working_dir: str = None):
     
     cmd = ["claude", "--dangerously-skip-permissions", "-p", prompt]
     
-    result = subprocess.run(
+    result = _run(
         cmd,
         text=True,
         capture_output=True,
@@ -140,7 +152,7 @@ def decompose(task_file: str) -> None:
     Side effects:
         - Creates {name}_plan.md
         - Creates {name}_children/ folder with subtask .md files
-        - Recursively decomposes complex subtasks
+        - Recursively decomposes complex subtasks, depth-first in name order
     """
     global node_count, seen_tasks
     
@@ -168,8 +180,9 @@ def decompose(task_file: str) -> None:
         print(f"No children directory created for {task_file}, treating as simple task")
         return
     
-    # Process each .md file in children_dir
-    for filename in os.listdir(children_path):
+    # Process each .md file in children_dir; sorting keeps the shape of the
+    # tree under the node limit independent of directory listing order
+    for filename in sorted(os.listdir(children_path)):
         if filename.endswith('.md'):
             child_file = os.path.join(children_path, filename)
             
@@ -0,0 +1,31 @@
+"""
+Caching for values read from task files
+"""
+
+import os
+from functools import lru_cache, wraps
+
+
+def file_cached(read):
+    """Cache read(path) until the file's modification time or size changes
+    
+    The wrapped function stats path on every call and raises OSError if it
+    cannot; call cache_clear() on it to forget every cached read.
+    
+    Args:
+        read: Function taking a file path and returning a value parsed from it
+        
+    Returns:
+        The caching wrapper around read
+    """
+    @lru_cache(maxsize=4096)
+    def cached(path: str, mtime_ns: int, size: int):
+        return read(path)
+    
+    @wraps(read)
+    def wrapper(path: str):
+        st = os.stat(path)
+        return cached(path, st.st_mtime_ns, st.st_size)
+    
+    wrapper.cache_clear = cached.cache_clear
+    return wrapper
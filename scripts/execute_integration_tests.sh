@@ -24,7 +24,7 @@ run_test() {
     
     echo -e "${YELLOW}Running ${test_name}...${NC}"
     
-    if python "$test_file" -v 2>&1; then
+    if python -m pytest -c pytest-all.ini "$test_file" -v 2>&1; then
         echo -e "${GREEN}✓ ${test_name} passed${NC}"
         ((PASSED_TESTS++))
     else
@@ -9,16 +9,30 @@ import subprocess
 from pathlib import Path
 from typing import List, Set, Optional, Tuple
 
+from file_cache import file_cached
+
+
+# Runs the Claude CLI; tests replace it to avoid patching subprocess
+_run = subprocess.run
 
 # Global state
 solved_tasks: Set[str] = set()
+solving_tasks: Set[str] = set()  # Tasks on the current solve path, to stop dependency cycles
 workspace_root: Optional[Path] = None
 
+# Body of a task's ### Dependents section, up to the next heading
+_DEPENDENTS_SECTION = re.compile(r'### Dependents\s*\n(.*?)(?:\n##|\n#|\Z)', re.DOTALL)
+
+# Markdown link to a task file: [Task Name](path/to/task.md)
+_TASK_LINK = re.compile(r'\[([^\]]+)\]\(([^)]+\.md)\)')
+
 
 def get_dependent(task_file: str) -> List[str]:
     """
     Read a markdown file and extract dependent tasks.
     
+    Parsed results are cached with file_cache.file_cached.
+    
     Args:
         task_file: Path to the markdown file
         
@@ -26,33 +40,41 @@ def get_dependent(task_file: str) -> List[str]:
         List of dependent file paths
     """
     try:
-        with open(task_file, 'r') as f:
-            content = f.read()
-        
-        # Find ### Dependents section
-        dependent_match = re.search(r'### Dependents\s*\n(.*?)(?:\n##|\n#|\Z)', content, re.DOTALL)
-        if not dependent_match:
-            return []
-        
-        dependent_section = dependent_match.group(1)
-        
-        # Extract markdown links [Task Name](path/to/task.md)
-        links = re.findall(r'\[([^\]]+)\]\(([^)]+\.md)\)', dependent_section)
-        
-        # Resolve relative paths to absolute paths
-        task_dir = Path(task_file).parent
-        dependent_files = []
-        for _, path in links:
-            # Resolve relative path from task file location
-            abs_path = (task_dir / path).resolve()
-            dependent_files.append(str(abs_path))
-        
-        return dependent_files
+        return list(_read_dependents(task_file))
     except Exception as e:
         print(f"Error reading dependents from {task_file}: {e}")
         return []
 
 
+@file_cached
+def _read_dependents(task_file: str) -> Tuple[str, ...]:
+    """Parse the Dependents section of task_file"""
+    with open(task_file, 'r') as f:
+        content = f.read()
+    
+    # Find ### Dependents section
+    dependent_match = _DEPENDENTS_SECTION.search(content)
+    if not dependent_match:
+        return ()
+    
+    dependent_section = dependent_match.group(1)
+    
+    # Resolve each linked path relative to the task file's location
+    task_dir = Path(task_file).parent
+    dependent_files = []
+    for link in _TASK_LINK.finditer(dependent_section):
+        abs_path = (task_dir / link.group(2)).resolve()
+        dependent_files.append(str(abs_path))
+    
+    return tuple(dependent_files)
+
+
+def _clear_caches() -> None:
+    """Forget all cached task file parses."""
+    _read_dependents.cache_clear()
+    _read_summary.cache_clear()
+
+
 def has_child_or_dependency(task_file: str) -> bool:
     """
     Check if a task has children or dependencies.
@@ -87,6 +109,19 @@ def extract_name(task_file: str) -> str:
     return Path(task_file).stem
 
 
+@file_cached
+def _read_summary(md_file: str) -> str:
+    """First line of md_file without its # prefix"""
+    with open(md_file, 'r') as f:
+        first_line = f.readline().strip()
+    
+    # Remove # prefix if present
+    summary = first_line.lstrip('#').strip()
+    if len(summary) > 60:
+        summary = summary[:57] + "..."
+    return summary
+
+
 def generate_tree_with_summaries(root_path: Path, current_task: str) -> str:
     """
     Generate a tree view of all tasks with their summaries.
@@ -99,34 +134,43 @@ def generate_tree_with_summaries(root_path: Path, current_task: str) -> str:
         Formatted tree string
     """
     lines = []
-    current_task_path = Path(current_task).resolve()
     
-    def walk_tree(path: Path, prefix: str = "", is_last: bool = True):
+    # Only files named like the current task are resolved to check for it;
+    # resolving both sides still finds it through symlinked folders
+    current_name = os.path.basename(current_task)
+    current_path = os.path.realpath(current_task)
+    
+    def walk_tree(path: Path, prefix: str = ""):
         """Recursively walk the tree and build visualization."""
         # Skip non-directories and hidden files
         if path.name.startswith('.'):
             return
         
+        # Scan the directory once; children folders are looked up by name
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except (FileNotFoundError, NotADirectoryError):
+            entries = []
+        subdir_names = {e.name for e in entries if e.is_dir()}
+        
         # Get all .md files in this directory (excluding _plan.md files)
-        md_files = [f for f in path.glob("*.md") if not f.name.endswith("_plan.md")]
+        md_files = sorted((e for e in entries
+                           if e.name.endswith(".md") and not e.name.endswith("_plan.md")),
+                          key=lambda e: e.name)
         
         # Process each .md file
-        for i, md_file in enumerate(sorted(md_files)):
+        for i, md_file in enumerate(md_files):
             is_last_file = (i == len(md_files) - 1)
             
-            # Read first line as summary
+            # First line as summary, reread only when the file changes
             try:
-                with open(md_file, 'r') as f:
-                    first_line = f.readline().strip()
-                    # Remove # prefix if present
-                    summary = first_line.lstrip('#').strip()
-                    if len(summary) > 60:
-                        summary = summary[:57] + "..."
-            except:
+                summary = _read_summary(md_file.path)
+            except (OSError, UnicodeDecodeError):
                 summary = "Unable to read summary"
             
             # Check if this is the current task
-            is_current = md_file.resolve() == current_task_path
+            is_current = md_file.name == current_name and os.path.realpath(md_file.path) == current_path
             marker = " [YOU ARE HERE]" if is_current else ""
             
             # Build the line
@@ -135,8 +179,9 @@ def generate_tree_with_summaries(root_path: Path, current_task: str) -> str:
             lines.append(line)
             
             # Check for children directory
-            children_dir = md_file.parent / f"{md_file.stem}_children"
-            if children_dir.exists() and children_dir.is_dir():
+            children_name = f"{os.path.splitext(md_file.name)[0]}_children"
+            if children_name in subdir_names:
+                children_dir = path / children_name
                 # Determine new prefix for children
                 extension = "    " if is_last_file else "│   "
                 walk_tree(children_dir, prefix + extension)
@@ -218,7 +263,7 @@ def agent(prompt: str, working_dir: str) -> str:
     print("⏳ Running headless, please wait...")
     
     try:
-        result = subprocess.run(
+        result = _run(
             cmd,
             capture_output=True,
             text=True,
@@ -252,6 +297,9 @@ def solve(task_file: str) -> None:
     """
     global workspace_root
     
+    # Key the cycle and solved checks on the same resolved paths get_dependent returns
+    task_file = os.path.realpath(task_file)
+    
     # Set workspace root if not already set
     if workspace_root is None:
         # Find workspace root by looking for parent with no more .md files above
@@ -267,47 +315,55 @@ def solve(task_file: str) -> None:
         if workspace_root is None:
             workspace_root = Path(task_file).parent
     
-    # Skip if already solved
-    if task_file in solved_tasks:
+    # Skip if already solved, or already being solved further up a cycle
+    if task_file in solved_tasks or task_file in solving_tasks:
         return
     
-    print(f"\n🔍 Processing: {task_file}")
-    
-    # Process dependencies first
-    dependents = get_dependent(task_file)
-    for dependent in dependents:
-        if dependent not in solved_tasks:
-            print(f"  → Solving dependency: {dependent}")
-            solve(dependent)
-    
-    # Process children (if any)
-    task_path = Path(task_file)
-    children_dir = task_path.parent / f"{extract_name(task_file)}_children"
-    
-    if children_dir.exists() and children_dir.is_dir():
-        child_files = [str(f) for f in children_dir.glob("*.md") if not f.name.endswith("_plan.md")]
+    solving_tasks.add(task_file)
+    try:
+        print(f"\n🔍 Processing: {task_file}")
+        
+        # Process dependencies first
+        dependents = get_dependent(task_file)
+        for dependent in dependents:
+            if dependent not in solved_tasks:
+                print(f"  → Solving dependency: {dependent}")
+                solve(dependent)
+        
+        # Process children (if any), listing the children folder in one scan
+        task_path = Path(task_file)
+        children_dir = task_path.parent / f"{extract_name(task_file)}_children"
+        
+        try:
+            with os.scandir(children_dir) as it:
+                child_files = [e.path for e in it
+                               if e.name.endswith(".md") and not e.name.endswith("_plan.md")]
+        except (FileNotFoundError, NotADirectoryError):
+            child_files = []
         
         for child_file in sorted(child_files):
             if child_file not in solved_tasks:
                 print(f"  → Solving child: {child_file}")
                 solve(child_file)
-    
-    # Now solve this task
-    print(f"\n📋 Solving task: {task_file}")
-    
-    # Generate tree context
-    tree_context = generate_tree_with_summaries(workspace_root, task_file)
-    
-    # Create prompt
-    prompt = solve_prompt(task_file, tree_context)
-    
-    # Call agent
-    working_dir = os.path.dirname(task_file)
-    response = agent(prompt, working_dir)
-    
-    # Mark as solved
-    solved_tasks.add(task_file)
-    print(f"✅ Completed: {task_file}")
+        
+        # Now solve this task
+        print(f"\n📋 Solving task: {task_file}")
+        
+        # Generate tree context
+        tree_context = generate_tree_with_summaries(workspace_root, task_file)
+        
+        # Create prompt
+        prompt = solve_prompt(task_file, tree_context)
+        
+        # Call agent
+        working_dir = os.path.dirname(task_file)
+        response = agent(prompt, working_dir)
+        
+        # Mark as solved
+        solved_tasks.add(task_file)
+        print(f"✅ Completed: {task_file}")
+    finally:
+        solving_tasks.discard(task_file)
 
 
 def main():
@@ -6,31 +6,204 @@ This script simulates Claude's responses for different types of prompts.
 
 import sys
 import os
-import re
-import json
+from functools import lru_cache
 from pathlib import Path
 
 
+# Prompt markers checked in order, mapped to the response type they select
+_PROMPT_TYPE_MARKERS = (
+    ("helping decompose a complex task", "decompose"),
+    ("solving a specific task", "solve"),
+    ("Your task is to implement", "implement"),
+)
+
+# Child task files created by decomposition; the generic ones are
+# formatted with the parent's task_name and file_name
+_CHILD_PARSE_EXPR = """# Parse Mathematical Expression
+
+## Type
+complex
+
+## Description
+Parse user input to extract numbers and operations.
+
+## Dependencies
+None
+
+## Dependents
+- [Build a Calculator CLI](../calculator.md)
+"""
+
+_CHILD_HANDLE_OPS = """# Handle Mathematical Operations
+
+## Type
+simple
+
+## Description
+Perform the actual calculations.
+
+## Dependencies
+- [Parse Expression](parse_expression.md)
+
+## Dependents
+- [Build a Calculator CLI](../calculator.md)
+"""
+
+_CHILD_DISPLAY = """# Display Calculation Result
+
+## Type
+simple
+
+## Description
+Format and display the result to the user.
+
+## Dependencies
+- [Handle Operations](handle_operations.md)
+
+## Dependents
+- [Build a Calculator CLI](../calculator.md)
+"""
+
+_CHILD_GENERIC_1 = """# Subtask 1
+
+## Type
+simple
+
+## Description
+First part of {task_name}
+
+## Dependencies
+None
+
+## Dependents
+- [{task_name}](../{file_name})
+"""
+
+_CHILD_GENERIC_2 = """# Subtask 2
+
+## Type
+simple
+
+## Description
+Second part of {task_name}
+
+## Dependencies
+- [Subtask 1](subtask1.md)
+
+## Dependents
+- [{task_name}](../{file_name})
+"""
+
+
+# Plan files created by decomposition, formatted with the task_name
+# and, for the generic plan, the base_name of the task file
+_PLAN_CALCULATOR = """# {task_name} - Decomposition Plan
+
+## Type
+complex
+
+## Overview
+This task requires breaking down into subtasks for:
+1. Expression parsing
+2. Operation handling
+3. Result display
+
+## Subtasks
+- [Parse Expression](calculator_children/parse_expression.md)
+- [Handle Operations](calculator_children/handle_operations.md)
+- [Display Result](calculator_children/display_result.md)
+
+## Status
+[ ] Not started
+"""
+
+_PLAN_SIMPLE = """# {task_name} - Decomposition Plan
+
+## Type
+simple
+
+## Overview
+This task can be solved directly without decomposition.
+
+## Status
+[ ] Not started
+"""
+
+_PLAN_GENERIC = """# {task_name} - Decomposition Plan
+
+## Type
+complex
+
+## Overview
+This task has been broken down into subtasks.
+
+## Subtasks
+- [Subtask 1]({base_name}_children/subtask1.md)
+- [Subtask 2]({base_name}_children/subtask2.md)
+
+## Status
+[ ] Not started
+"""
+
+
+def _extract_after(prompt, marker, suffix=""):
+    """Return the rest of the first line containing marker
+    
+    With a suffix the result is cut after the last occurrence of suffix
+    on that line. Returns None if marker, suffix or the text is missing.
+    """
+    start = prompt.find(marker)
+    if start < 0:
+        return None
+    start += len(marker)
+    end = prompt.find("\n", start)
+    if end < 0:
+        end = len(prompt)
+    if suffix:
+        last = prompt.rfind(suffix, start + 1, end)
+        if last < 0:
+            return None
+        end = last + len(suffix)
+    return prompt[start:end] or None
+
+
+def _write(path, data):
+    """Write bytes to path with a single open/write/close"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
+def _write_if_changed(path, content):
+    """Write content to path unless the file already holds exactly that"""
+    data = content.encode()
+    try:
+        if os.stat(path).st_size == len(data) and Path(path).read_bytes() == data:
+            return
+    except FileNotFoundError:
+        pass
+    _write(path, data)
+
+
+@lru_cache(maxsize=256)
 def extract_prompt_type(prompt):
     """Determine what type of response is expected based on the prompt"""
-    if "helping decompose a complex task" in prompt:
-        return "decompose"
-    elif "solving a specific task" in prompt:
-        return "solve"
-    elif "Your task is to implement" in prompt:
-        return "implement"
+    for marker, prompt_type in _PROMPT_TYPE_MARKERS:
+        if marker in prompt:
+            return prompt_type
     return "unknown"
 
 
+@lru_cache(maxsize=256)
 def extract_task_info(prompt):
     """Extract task information from the prompt"""
     # Extract task name from markdown header
-    task_match = re.search(r'# (.+)', prompt)
-    task_name = task_match.group(1) if task_match else "Unknown Task"
+    task_name = _extract_after(prompt, "# ") or "Unknown Task"
     
     # Extract file path from prompt
-    file_match = re.search(r'Task file: (.+\.md)', prompt)
-    file_path = file_match.group(1) if file_match else None
+    file_path = _extract_after(prompt, "Task file: ", ".md")
     
     return task_name, file_path
 
@@ -38,9 +211,10 @@ def extract_task_info(prompt):
 def generate_decompose_response(task_name, file_path):
     """Generate a mock decomposition response"""
     base_name = Path(file_path).stem if file_path else "task"
+    name = task_name.lower()
     
     # Create different responses based on task complexity
-    if "calculator" in task_name.lower():
+    if "calculator" in name:
         return f"""I'll decompose this calculator task into subtasks.
 
 Creating {base_name}_plan.md with the decomposition plan...
@@ -53,7 +227,7 @@ The task has been decomposed into 3 subtasks:
 
 All files have been created successfully."""
     
-    elif "simple" in task_name.lower():
+    elif "simple" in name:
         return f"""This is a simple task that doesn't need decomposition.
 
 Creating {base_name}_plan.md to mark this as a simple task...
@@ -108,161 +282,52 @@ def create_decompose_files(prompt):
     if not file_path:
         return
     
-    base_dir = Path(file_path).parent
-    base_name = Path(file_path).stem
+    task_path = Path(file_path)
+    base_dir, base_name, file_name = task_path.parent, task_path.stem, task_path.name
     
     # Create plan file
     plan_path = base_dir / f"{base_name}_plan.md"
+    name = task_name.lower()
     
-    if "calculator" in task_name.lower():
+    if "calculator" in name:
         # Create complex decomposition
-        plan_content = f"""# {task_name} - Decomposition Plan
-
-## Type
-complex
-
-## Overview
-This task requires breaking down into subtasks for:
-1. Expression parsing
-2. Operation handling
-3. Result display
-
-## Subtasks
-- [Parse Expression](calculator_children/parse_expression.md)
-- [Handle Operations](calculator_children/handle_operations.md)
-- [Display Result](calculator_children/display_result.md)
-
-## Status
-[ ] Not started
-"""
+        plan_content = _PLAN_CALCULATOR.format(task_name=task_name)
         
         # Create children directory
         children_dir = base_dir / f"{base_name}_children"
         children_dir.mkdir(exist_ok=True)
         
         # Create child task files
-        (children_dir / "parse_expression.md").write_text("""# Parse Mathematical Expression
-
-## Type
-complex
-
-## Description
-Parse user input to extract numbers and operations.
-
-## Dependencies
-None
-
-## Dependents
-- [Build a Calculator CLI](../calculator.md)
-""")
-        
-        (children_dir / "handle_operations.md").write_text("""# Handle Mathematical Operations
-
-## Type
-simple
-
-## Description
-Perform the actual calculations.
-
-## Dependencies
-- [Parse Expression](parse_expression.md)
-
-## Dependents
-- [Build a Calculator CLI](../calculator.md)
-""")
+        _write_if_changed(children_dir / "parse_expression.md", _CHILD_PARSE_EXPR)
+        _write_if_changed(children_dir / "handle_operations.md", _CHILD_HANDLE_OPS)
+        _write_if_changed(children_dir / "display_result.md", _CHILD_DISPLAY)
         
-        (children_dir / "display_result.md").write_text("""# Display Calculation Result
-
-## Type
-simple
-
-## Description
-Format and display the result to the user.
-
-## Dependencies
-- [Handle Operations](handle_operations.md)
-
-## Dependents
-- [Build a Calculator CLI](../calculator.md)
-""")
-        
-    elif "simple" in task_name.lower():
+    elif "simple" in name:
         # Simple task - no decomposition
-        plan_content = f"""# {task_name} - Decomposition Plan
-
-## Type
-simple
-
-## Overview
-This task can be solved directly without decomposition.
-
-## Status
-[ ] Not started
-"""
+        plan_content = _PLAN_SIMPLE.format(task_name=task_name)
     
     else:
         # Generic decomposition
-        plan_content = f"""# {task_name} - Decomposition Plan
-
-## Type
-complex
-
-## Overview
-This task has been broken down into subtasks.
-
-## Subtasks
-- [Subtask 1]({base_name}_children/subtask1.md)
-- [Subtask 2]({base_name}_children/subtask2.md)
-
-## Status
-[ ] Not started
-"""
+        plan_content = _PLAN_GENERIC.format(task_name=task_name, base_name=base_name)
         
         # Create children directory and files
         children_dir = base_dir / f"{base_name}_children"
         children_dir.mkdir(exist_ok=True)
         
-        (children_dir / "subtask1.md").write_text(f"""# Subtask 1
-
-## Type
-simple
-
-## Description
-First part of {task_name}
-
-## Dependencies
-None
-
-## Dependents
-- [{task_name}](../{Path(file_path).name})
-""")
-        
-        (children_dir / "subtask2.md").write_text(f"""# Subtask 2
-
-## Type
-simple
-
-## Description
-Second part of {task_name}
-
-## Dependencies
-- [Subtask 1](subtask1.md)
-
-## Dependents
-- [{task_name}](../{Path(file_path).name})
-""")
+        _write_if_changed(children_dir / "subtask1.md", _CHILD_GENERIC_1.format(task_name=task_name, file_name=file_name))
+        _write_if_changed(children_dir / "subtask2.md", _CHILD_GENERIC_2.format(task_name=task_name, file_name=file_name))
     
-    plan_path.write_text(plan_content)
+    _write_if_changed(plan_path, plan_content)
 
 
 def create_solve_files(prompt):
     """Update plan files that Claude would update during solve"""
     # Extract current task file from prompt
-    current_file_match = re.search(r'Current task file: (.+\.md)', prompt)
-    if not current_file_match:
+    current_file = _extract_after(prompt, "Current task file: ", ".md")
+    if not current_file:
         return
     
-    current_task_path = Path(current_file_match.group(1))
+    current_task_path = Path(current_file)
     task_name = current_task_path.stem
     
     # Find corresponding plan file
@@ -322,20 +387,42 @@ Solution completed as requested.
 ## Progress
 {solution_content}
 """
-        plan_path.write_text(plan_content)
+        _write(plan_path, plan_content.encode())
     else:
         # Update existing plan file
-        existing_content = plan_path.read_text()
+        original = plan_path.read_text()
+        text = original.replace("[ ] Not started", "[x] Completed")
         
-        # Add progress section
-        if "## Progress" not in existing_content:
-            existing_content += "\n## Progress\n"
+        # Add solution under the progress section, creating it if missing
+        if "## Progress" in text:
+            text = text.replace("## Progress", f"## Progress\n\n{solution_content}")
+        else:
+            text = f"{text}\n## Progress\n\n{solution_content}\n"
         
-        # Update status and add solution
-        existing_content = existing_content.replace("[ ] Not started", "[x] Completed")
-        existing_content = existing_content.replace("## Progress", f"## Progress\n\n{solution_content}")
-        
-        plan_path.write_text(existing_content)
+        if text != original:
+            _write(plan_path, text.encode())
+
+
+def handle_prompt(prompt):
+    """Respond to a prompt as Claude would
+    
+    Creates the files Claude would create for the prompt and returns the
+    text Claude would print to stdout.
+    """
+    prompt_type = extract_prompt_type(prompt)
+    task_name, file_path = extract_task_info(prompt)
+    
+    # Generate appropriate response
+    if prompt_type == "decompose":
+        output = generate_decompose_response(task_name, file_path)
+        create_decompose_files(prompt)
+    elif prompt_type == "solve" or prompt_type == "implement":
+        output = generate_solve_response(task_name, prompt)
+        create_solve_files(prompt)
+    else:
+        output = f"Mock Claude: Handling {task_name}\nTask processed successfully."
+    
+    return output
 
 
 def main():
@@ -346,30 +433,16 @@ def main():
         sys.exit(1)
     
     # Skip flags and find prompt
-    prompt = None
-    for i, arg in enumerate(sys.argv):
-        if arg == '-p' and i + 1 < len(sys.argv):
-            prompt = sys.argv[i + 1]
-            break
+    try:
+        prompt = sys.argv[sys.argv.index('-p') + 1]
+    except (ValueError, IndexError):
+        prompt = None
     
     if not prompt:
         print("Error: No prompt provided")
         sys.exit(1)
     
-    # Determine response type
-    prompt_type = extract_prompt_type(prompt)
-    task_name, file_path = extract_task_info(prompt)
-    
-    # Generate appropriate response
-    if prompt_type == "decompose":
-        print(generate_decompose_response(task_name, file_path))
-        create_decompose_files(prompt)
-    elif prompt_type == "solve" or prompt_type == "implement":
-        print(generate_solve_response(task_name, prompt))
-        create_solve_files(prompt)
-    else:
-        print(f"Mock Claude: Handling {task_name}")
-        print("Task processed successfully.")
+    print(handle_prompt(prompt))
 
 
 if __name__ == "__main__":
@@ -3,44 +3,56 @@
 Unit tests for the decompose module
 """
 
-import os
-import sys
-import shutil
+import contextlib
+import io
+import subprocess
 import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import patch, MagicMock, call
-
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+from unittest.mock import patch
 
 import decompose
 
 
+# Successful Claude run, shared by every test that doesn't need another result
+_OK = subprocess.CompletedProcess([], 0, '', '')
+
+
 class TestDecomposeModule(unittest.TestCase):
     """Unit tests for decompose.py"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Create one temporary directory shared by every test in the class"""
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls._root = Path(tmp.name)
+        
+        # Replace the Claude runner once for the class; setUp resets the mock
+        run_patcher = patch.object(decompose, '_run')
+        cls._mock_run = run_patcher.start()
+        cls.addClassCleanup(run_patcher.stop)
+    
     def setUp(self):
         """Set up test environment"""
-        self.test_dir = Path(tempfile.mkdtemp())
-        self.original_cwd = os.getcwd()
-        os.chdir(self.test_dir)
+        # Each test works in its own subdirectory of the shared one
+        self.test_dir = self._root / self._testMethodName
+        self.test_dir.mkdir()
         
-        # Reset global state
-        decompose.node_count = 0
-        decompose.seen_tasks = set()
+        # Forget calls and side effects from the previous test
+        self._mock_run.reset_mock(return_value=True, side_effect=True)
+        self._mock_run.return_value = _OK
         
-        # Path to mock claude
-        self.mock_claude = Path(__file__).parent.parent.parent / "integration" / "mock_claude.py"
+        # Reset global state now and again once the test is done
+        self._reset_globals()
+        self.addCleanup(self._reset_globals)
     
-    def tearDown(self):
-        """Clean up test environment"""
-        os.chdir(self.original_cwd)
-        shutil.rmtree(self.test_dir)
-        
-        # Reset globals
+    @staticmethod
+    def _reset_globals():
+        """Reset decompose's module-level tracking state and file cache"""
         decompose.node_count = 0
         decompose.seen_tasks = set()
+        decompose._read_is_complex.cache_clear()
     
     def test_extract_name(self):
         """Test extract_name function"""
@@ -95,25 +107,21 @@ No type specified.""")
 
 This is a simple task.""")
         
-        # Mock subprocess
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            decompose.decompose(str(task_file))
-            
-            # Verify Claude was called
-            mock_run.assert_called_once()
-            call_args = mock_run.call_args[0][0]
-            self.assertEqual(call_args[0], 'claude')
-            self.assertIn('--dangerously-skip-permissions', call_args)
-            
-            # Verify prompt contains task content
-            prompt = call_args[-1]
-            self.assertIn("Simple Task", prompt)
-            self.assertIn("helping decompose a complex task", prompt)
-            
-            # Verify node count
-            self.assertEqual(decompose.node_count, 1)
+        decompose.decompose(str(task_file))
+        
+        # Verify Claude was called
+        self._mock_run.assert_called_once()
+        call_args = self._mock_run.call_args[0][0]
+        self.assertEqual(call_args[0], 'claude')
+        self.assertIn('--dangerously-skip-permissions', call_args)
+        
+        # Verify prompt contains task content
+        prompt = call_args[-1]
+        self.assertIn("Simple Task", prompt)
+        self.assertIn("helping decompose a complex task", prompt)
+        
+        # Verify node count
+        self.assertEqual(decompose.node_count, 1)
     
     def test_decompose_with_existing_plan(self):
         """Test that existing plan files are skipped"""
@@ -123,14 +131,10 @@ This is a simple task.""")
         plan_file = self.test_dir / "task_plan.md"
         plan_file.write_text("# Existing plan")
         
-        with patch('subprocess.run') as mock_run:
-            # Even if called, set proper return value
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            decompose.decompose(str(task_file))
-            
-            # Should still complete (plan exists check happens in agent)
-            self.assertTrue(True)
+        decompose.decompose(str(task_file))
+        
+        # Should still complete (plan exists check happens in agent)
+        self.assertTrue(True)
     
     def test_decompose_complex_task_recursive(self):
         """Test recursive decomposition of complex tasks"""
@@ -140,8 +144,8 @@ This is a simple task.""")
         
         # Mock subprocess to simulate Claude creating files
         def mock_subprocess_run(cmd, *args, **kwargs):
-            if 'decompose this task' in cmd[-1]:
-                # First call - create complex subtask
+            if "Task file: " + str(task_file) in cmd[-1]:
+                # Root call - create complex subtask
                 plan_file = self.test_dir / "main_plan.md"
                 plan_file.write_text("""# Main Task - Plan
 
@@ -164,14 +168,62 @@ complex
 ## Description
 This needs further decomposition.""")
                 
-            return MagicMock(returncode=0)
+            return _OK
         
-        with patch('subprocess.run', side_effect=mock_subprocess_run):
-            decompose.decompose(str(task_file))
-            
-            # Should process main task and find complex subtask
-            self.assertTrue((self.test_dir / "main_plan.md").exists())
-            self.assertTrue((self.test_dir / "main_children" / "complex_subtask.md").exists())
+        self._mock_run.side_effect = mock_subprocess_run
+        decompose.decompose(str(task_file))
+        
+        # Should process main task and find complex subtask
+        self.assertTrue((self.test_dir / "main_plan.md").exists())
+        self.assertTrue((self.test_dir / "main_children" / "complex_subtask.md").exists())
+    
+    def test_decompose_complex_siblings(self):
+        """Test that every complex sibling subtree is decomposed"""
+        task_file = self.test_dir / "main.md"
+        task_file.write_text("# Main Task")
+        
+        def mock_subprocess_run(cmd, *args, **kwargs):
+            if "Task file: " + str(task_file) in cmd[-1]:
+                children_dir = self.test_dir / "main_children"
+                children_dir.mkdir()
+                for name in ("first", "second"):
+                    (children_dir / f"{name}.md").write_text(f"# {name}\n\n## Type\ncomplex\n")
+                (children_dir / "leaf.md").write_text("# leaf\n\n## Type\nsimple\n")
+            return _OK
+        
+        self._mock_run.side_effect = mock_subprocess_run
+        decompose.decompose(str(task_file))
+        
+        # Root plus both complex children, but not the simple leaf
+        prompts = [c.args[0][-1] for c in self._mock_run.call_args_list]
+        self.assertEqual(len(prompts), 3)
+        self.assertTrue(any("first.md" in p for p in prompts))
+        self.assertTrue(any("second.md" in p for p in prompts))
+        self.assertFalse(any("Task file: " + str(self.test_dir / "main_children" / "leaf.md") in p
+                             for p in prompts))
+        self.assertEqual(decompose.node_count, 3)
+    
+    def test_node_limit_tree_shape(self):
+        """Test that the node limit always cuts the same depth-first branch"""
+        task_file = self.test_dir / "r.md"
+        task_file.write_text("# r")
+        
+        # Every decomposed task gets three complex children, written out of order
+        def mock_subprocess_run(cmd, *args, **kwargs):
+            decomposed = Path(cmd[-1].split("Task file: ", 1)[1].split("\n", 1)[0])
+            children_dir = decomposed.parent / f"{decomposed.stem}_children"
+            children_dir.mkdir()
+            for name in ("z", "x", "y"):
+                (children_dir / f"{decomposed.stem}{name}.md").write_text("# t\n\n## Type\ncomplex\n")
+            return _OK
+        
+        self._mock_run.side_effect = mock_subprocess_run
+        decompose.decompose(str(task_file))
+        
+        decomposed = [Path(c.args[0][-1].split("Task file: ", 1)[1].split("\n", 1)[0]).stem
+                      for c in self._mock_run.call_args_list]
+        self.assertEqual(decomposed, ["r", "rx", "rxx", "rxxx", "rxxxx"])
+        self.assertEqual(decompose.node_count, 5)
     
     def test_node_limit(self):
         """Test that decomposition respects 5-node limit"""
@@ -181,59 +233,52 @@ This needs further decomposition.""")
         # Set node count near limit
         decompose.node_count = 4
         
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            decompose.decompose(str(task_file))
-            
-            # Should still process (count = 5)
-            mock_run.assert_called_once()
-            self.assertEqual(decompose.node_count, 5)
+        decompose.decompose(str(task_file))
+        
+        # Should still process (count = 5)
+        self._mock_run.assert_called_once()
+        self.assertEqual(decompose.node_count, 5)
         
         # Now at limit
         task_file2 = self.test_dir / "task2.md"
         task_file2.write_text("# Task 2")
         
-        with patch('subprocess.run') as mock_run:
-            decompose.decompose(str(task_file2))
-            
-            # Should not process
-            mock_run.assert_not_called()
-            self.assertEqual(decompose.node_count, 5)
+        self._mock_run.reset_mock()
+        decompose.decompose(str(task_file2))
+        
+        # Should not process
+        self._mock_run.assert_not_called()
+        self.assertEqual(decompose.node_count, 5)
     
     def test_error_handling(self):
         """Test error handling in decompose"""
         # Non-existent file
         with self.assertRaises(FileNotFoundError):
-            decompose.decompose("non_existent.md")
+            decompose.decompose(str(self.test_dir / "non_existent.md"))
         
         # Claude failure
         task_file = self.test_dir / "task.md"
         task_file.write_text("# Task")
         
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=1, stderr="Error")
-            
-            # Should raise Exception on Claude error
-            with self.assertRaises(Exception) as ctx:
-                decompose.decompose(str(task_file))
-            self.assertIn("Claude failed", str(ctx.exception))
+        self._mock_run.return_value = subprocess.CompletedProcess([], 1, '', "Error")
+        
+        # Should raise Exception on Claude error
+        with self.assertRaises(Exception) as ctx:
+            decompose.decompose(str(task_file))
+        self.assertIn("Claude failed", str(ctx.exception))
     
     def test_duplicate_task_detection(self):
         """Test that seen tasks are not processed twice"""
         task_file = self.test_dir / "task.md"
         task_file.write_text("# Task")
         
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            # First call
-            decompose.decompose(str(task_file))
-            self.assertEqual(mock_run.call_count, 1)
-            
-            # Second call - should process again (no duplicate detection in current impl)
-            decompose.decompose(str(task_file))
-            self.assertEqual(mock_run.call_count, 2)  # Will be called again
+        # First call
+        decompose.decompose(str(task_file))
+        self.assertEqual(self._mock_run.call_count, 1)
+        
+        # Second call - should process again (no duplicate detection in current impl)
+        decompose.decompose(str(task_file))
+        self.assertEqual(self._mock_run.call_count, 2)  # Will be called again
     
     def test_workspace_root_setting(self):
         """Test workspace root is set correctly"""
@@ -244,32 +289,19 @@ This needs further decomposition.""")
         task_file = nested_dir / "task.md"
         task_file.write_text("# Task")
         
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            decompose.decompose(str(task_file))
-            
-            # Should complete without error
-            self.assertTrue(True)
+        decompose.decompose(str(task_file))
+        
+        # Should complete without error
+        self.assertTrue(True)
     
     def test_progress_display(self):
         """Test progress display during decomposition"""
         task_file = self.test_dir / "task.md"
         task_file.write_text("# Task")
         
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            with patch('builtins.print') as mock_print:
-                decompose.decompose(str(task_file))
-                
-                # Should print progress
-                print_calls = [call[0][0] for call in mock_print.call_args_list]
-                
-                # Look for node count display
-                node_displays = [c for c in print_calls if "Node " in c and "/5" in c]
-                self.assertTrue(len(node_displays) > 0)
-
-
-if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            decompose.decompose(str(task_file))
+        
+        # Should print progress with a node count display
+        self.assertRegex(out.getvalue(), r"Node \d+/5")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the file_cache module and the task file readers built on it
+"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+import decompose
+import solve
+
+
+# Reader under test, with the file it reads before and after a rewrite
+CACHED_READERS = [
+    ("is_complex", decompose.is_complex,
+     "# Task\n\n## Type\ncomplex\n", "# Task\n\n## Type\nsimple\n"),
+    ("get_dependent", solve.get_dependent,
+     "# Task\n\n### Dependents\n- [Parent](parent.md)\n",
+     "# Task\n\n### Dependents\n- [Other](other.md)\n"),
+    ("summary", solve._read_summary, "# Task", "# Renamed Task"),
+]
+
+
+@pytest.mark.parametrize("reader, before, after",
+                         [case[1:] for case in CACHED_READERS],
+                         ids=[case[0] for case in CACHED_READERS])
+def test_reader_cached(reader, before, after, tmp_path):
+    """Test that a file-cached reader only rereads a file after it changes"""
+    task_file = tmp_path / "task.md"
+    task_file.write_text(before)
+    
+    with patch('builtins.open', wraps=open) as mock_open:
+        first = reader(str(task_file))
+        assert reader(str(task_file)) == first
+        assert mock_open.call_count == 1
+        
+        # A rewrite changes the size, so the file is read again
+        task_file.write_text(after)
+        assert reader(str(task_file)) != first
+        assert mock_open.call_count == 2
+
+
+def test_cache_clear(tmp_path):
+    """Test that cache_clear forgets cached reads"""
+    task_file = tmp_path / "task.md"
+    task_file.write_text("# Task")
+    
+    with patch('builtins.open', wraps=open) as mock_open:
+        solve._read_summary(str(task_file))
+        solve._read_summary.cache_clear()
+        solve._read_summary(str(task_file))
+        assert mock_open.call_count == 2
+
+
+def test_missing_file_raises(tmp_path):
+    """Test that a file which cannot be stat'ed raises OSError"""
+    with pytest.raises(OSError):
+        solve._read_summary(str(tmp_path / "missing.md"))
+
+
+
+def test_read_error_not_cached(tmp_path):
+    """Test that a failed read is retried even though the file is unchanged"""
+    task_file = tmp_path / "task.md"
+    task_file.write_text("# Task\n\n## Type\ncomplex\n\n### Dependents\n- [Parent](parent.md)\n")
+    
+    with patch('builtins.open', side_effect=PermissionError("denied")):
+        assert decompose.is_complex(str(task_file)) is False
+        assert solve.get_dependent(str(task_file)) == []
+    
+    assert decompose.is_complex(str(task_file)) is True
+    assert solve.get_dependent(str(task_file)) == [os.path.realpath(tmp_path / "parent.md")]
@@ -4,49 +4,115 @@ Unit tests for the solve module
 """
 
 import os
-import sys
-import shutil
-import tempfile
-import unittest
-from pathlib import Path
-from unittest.mock import patch, MagicMock, call
+import types
 
-# Add project root to path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+import pytest
 
 import solve
 
 
-class TestSolveModule(unittest.TestCase):
-    """Unit tests for solve.py"""
-    
-    def setUp(self):
-        """Set up test environment"""
-        self.test_dir = Path(tempfile.mkdtemp())
-        self.original_cwd = os.getcwd()
-        os.chdir(self.test_dir)
-        
-        # Reset global state
-        solve.solved_tasks = set()
-        solve.workspace_root = None
-        
-        # Path to mock claude
-        self.mock_claude = Path(__file__).parent.parent.parent / "integration" / "mock_claude.py"
-    
-    def tearDown(self):
-        """Clean up test environment"""
-        os.chdir(self.original_cwd)
-        shutil.rmtree(self.test_dir)
-        
-        # Reset globals
-        solve.solved_tasks = set()
-        solve.workspace_root = None
-    
-    def test_get_dependent(self):
-        """Test get_dependent function"""
-        # Create task with dependents
-        task_file = self.test_dir / "task.md"
-        task_file.write_text("""# Task
+# Claude run results; FakeRun returns _OK unless a test sets another result.
+# solve runs Claude in text mode, so the output fields are str.
+_OK = types.SimpleNamespace(returncode=0, stdout='', stderr='')
+_FAIL = types.SimpleNamespace(returncode=1, stdout='', stderr='Error')
+
+
+# Task file bodies shared by several tests, filled in with str.format
+_TASK_MD = """# {title}
+
+## Type
+{type}
+
+## Description
+{description}"""
+
+_ROOT_CHILD_MD = """# {title}
+
+## Type
+simple
+
+## Dependencies
+{dependencies}
+
+## Dependents
+- [Root Task](../root.md)"""
+
+# Tests written against a per-task solve_task entry point that solve never had
+_NO_SOLVE_TASK = pytest.mark.xfail(raises=AttributeError, strict=True,
+                                   reason="solve has no solve_task; solve() walks the whole tree")
+
+
+def write_tree(root, files):
+    """Write a tree of task files under root
+    
+    Args:
+        root: Directory to create the files in
+        files: Mapping of paths relative to root to file contents
+    """
+    for parent in {(root / rel).parent for rel in files}:
+        parent.mkdir(parents=True, exist_ok=True)
+    for rel, content in files.items():
+        fd = os.open(root / rel, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, content.encode())
+        finally:
+            os.close(fd)
+
+
+class FakeRun:
+    """Stand-in for solve._run that records each command it is given
+    
+    Records the command in calls and its working directory in cwds, then
+    returns result, after passing the command to on_call when a test sets
+    one.
+    """
+    
+    def __init__(self):
+        self.calls = []
+        self.cwds = []
+        self.result = _OK
+        self.on_call = None
+    
+    def __call__(self, cmd, *args, **kwargs):
+        self.calls.append(cmd)
+        self.cwds.append(kwargs.get('cwd'))
+        if self.on_call is not None:
+            self.on_call(cmd)
+        return self.result
+
+
+@pytest.fixture
+def fake_run(monkeypatch):
+    """Replace solve._run with a FakeRun for one test"""
+    run = FakeRun()
+    monkeypatch.setattr(solve, "_run", run)
+    return run
+
+
+@pytest.fixture(scope="session")
+def task_tree(tmp_path_factory):
+    """Task tree shared by the tests that only read it
+    
+    root.md has two children and child1.md has a grandchild; plan files and
+    a children folder with no task file sit alongside them.
+    """
+    root = tmp_path_factory.mktemp("tree")
+    write_tree(root, {
+        "root.md": "# Root Task",
+        "root_plan.md": "# Root Plan",
+        "root_children/child1.md": "# Child 1",
+        "root_children/child2.md": "# Child 2",
+        "root_children/child_plan.md": "# Plan",
+        "root_children/child1_children/grandchild.md": "# Grandchild",
+        # Folder without a matching task file is not walked
+        "orphan_children/lost.md": "# Lost",
+    })
+    return root
+
+
+def test_get_dependent(tmp_path):
+    """Test that get_dependent finds exactly the linked Dependents"""
+    write_tree(tmp_path, {"task.md": """# Task
 
 ## Description
 Some task
@@ -54,284 +120,258 @@ Some task
 ### Dependents
 - [Parent Task](../parent.md)
 - [Sibling Task](sibling.md)
-""")
-        
-        dependents = solve.get_dependent(str(task_file))
-        
-        # Should extract both dependent paths
-        self.assertEqual(len(dependents), 2)
-        
-        # Paths should be absolute
-        for dep in dependents:
-            self.assertTrue(Path(dep).is_absolute())
-        
-        # Check relative resolution
-        expected_parent = (self.test_dir.parent / "parent.md").resolve()
-        expected_sibling = (self.test_dir / "sibling.md").resolve()
-        
-        dependent_paths = [Path(d) for d in dependents]
-        self.assertIn(expected_parent, dependent_paths)
-        self.assertIn(expected_sibling, dependent_paths)
-    
-    def test_get_dependencies(self):
-        """Test get_dependencies function"""
-        # Create task with dependencies
-        task_file = self.test_dir / "task.md"
-        task_file.write_text("""# Task
+"""})
+    
+    found = solve.get_dependent(str(tmp_path / "task.md"))
+    
+    # Paths should be absolute and resolved relative to the task file
+    assert list(found) == [os.path.realpath(tmp_path.parent / "parent.md"),
+                           os.path.realpath(tmp_path / "sibling.md")]
+
+
+@pytest.mark.xfail(raises=AttributeError, strict=True,
+                   reason="solve has no get_dependencies; Dependencies are not parsed")
+def test_get_dependencies(tmp_path):
+    """Test get_dependencies function"""
+    write_tree(tmp_path, {"task.md": """# Task
 
 ## Dependencies
 - [Dep 1](dep1.md)
 - [Dep 2](subdir/dep2.md)
 
 ## Description
-Task with dependencies""")
-        
-        deps = solve.get_dependencies(str(task_file))
-        
-        # Should extract both dependencies
-        self.assertEqual(len(deps), 2)
-        
-        # Check resolution
-        expected_dep1 = self.test_dir / "dep1.md"
-        expected_dep2 = self.test_dir / "subdir" / "dep2.md"
-        
-        dep_paths = [Path(d) for d in deps]
-        self.assertIn(expected_dep1.resolve(), dep_paths)
-        self.assertIn(expected_dep2.resolve(), dep_paths)
-    
-    def test_has_children(self):
-        """Test has_children function"""
-        # Task without children
-        task_file = self.test_dir / "simple.md"
-        task_file.write_text("# Simple Task")
-        
-        self.assertFalse(solve.has_children(str(task_file)))
-        
-        # Task with children directory
-        complex_file = self.test_dir / "complex.md"
-        complex_file.write_text("# Complex Task")
-        
-        children_dir = self.test_dir / "complex_children"
-        children_dir.mkdir()
-        (children_dir / "child1.md").write_text("# Child 1")
-        
-        self.assertTrue(solve.has_children(str(complex_file)))
-        
-        # Empty children directory
-        empty_file = self.test_dir / "empty.md"
-        empty_file.write_text("# Empty Task")
-        
-        empty_children = self.test_dir / "empty_children"
-        empty_children.mkdir()
-        
-        self.assertFalse(solve.has_children(str(empty_file)))
-    
-    def test_get_children(self):
-        """Test get_children function"""
-        task_file = self.test_dir / "parent.md"
-        task_file.write_text("# Parent Task")
-        
-        # Create children
-        children_dir = self.test_dir / "parent_children"
-        children_dir.mkdir()
-        
-        child1 = children_dir / "child1.md"
-        child2 = children_dir / "child2.md"
-        plan_file = children_dir / "child_plan.md"  # Should be excluded
-        
-        child1.write_text("# Child 1")
-        child2.write_text("# Child 2")
-        plan_file.write_text("# Plan")
-        
-        children = solve.get_children(str(task_file))
-        
-        # Should get only .md files, excluding _plan.md
-        self.assertEqual(len(children), 2)
-        self.assertIn(str(child1), children)
-        self.assertIn(str(child2), children)
-        self.assertNotIn(str(plan_file), children)
-    
-    def test_tree_context_generation(self):
-        """Test generate_tree_context function"""
-        # Create a tree structure
-        root = self.test_dir / "root.md"
-        root.write_text("# Root Task")
-        
-        children_dir = self.test_dir / "root_children"
-        children_dir.mkdir()
-        
-        child1 = children_dir / "child1.md"
-        child1.write_text("# Child 1")
-        
-        child2 = children_dir / "child2.md"
-        child2.write_text("# Child 2")
-        
-        # Create grandchildren
-        grandchildren_dir = children_dir / "child1_children"
-        grandchildren_dir.mkdir()
-        
-        grandchild = grandchildren_dir / "grandchild.md"
-        grandchild.write_text("# Grandchild")
-        
-        # Test context from different positions
-        context = solve.generate_tree_context(str(root), str(grandchild))
-        
-        # Should contain tree structure
-        self.assertIn("Root Task", context)
-        self.assertIn("Child 1", context)
-        self.assertIn("Child 2", context)
-        self.assertIn("Grandchild", context)
-        self.assertIn("YOU ARE HERE", context)
-        
-        # Tree markers
-        self.assertIn("├──", context)
-        self.assertIn("└──", context)
-    
-    def test_solve_simple_task(self):
-        """Test solving a simple task"""
-        task_file = self.test_dir / "simple.md"
-        task_file.write_text("""# Simple Task
+Task with dependencies"""})
+    
+    deps = solve.get_dependencies(str(tmp_path / "task.md"))
+    
+    assert frozenset(deps) == {os.path.realpath(tmp_path / "dep1.md"),
+                               os.path.realpath(tmp_path / "subdir" / "dep2.md")}
 
-## Type
-simple
 
-## Description
-A simple task to solve""")
-        
-        # Set workspace root
-        solve.workspace_root = self.test_dir
-        
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            with patch('os.chdir') as mock_chdir:
-                solve.solve_task(str(task_file), str(self.test_dir))
-                
-                # Should change to workspace directory
-                mock_chdir.assert_called_with(self.test_dir)
-                
-                # Should call Claude
-                mock_run.assert_called_once()
-                call_args = mock_run.call_args[0][0]
-                
-                # Verify command structure
-                self.assertEqual(call_args[0], 'claude')
-                self.assertIn('--dangerously-skip-permissions', call_args)
-                
-                # Verify prompt
-                prompt = call_args[-1]
-                self.assertIn("solve this task", prompt)
-                self.assertIn("Simple Task", prompt)
-        
-        # Task should be marked as solved
-        self.assertIn(str(task_file), solve.solved_tasks)
-    
-    def test_solve_with_dependencies(self):
-        """Test solving a task with dependencies"""
-        # Create task with dependencies
-        task_file = self.test_dir / "task.md"
-        task_file.write_text("""# Main Task
+@pytest.mark.xfail(raises=AttributeError, strict=True,
+                   reason="solve has no get_children; solve scans the children folder itself")
+def test_get_children(tmp_path):
+    """Test get_children function"""
+    write_tree(tmp_path, {
+        "parent.md": "# Parent Task",
+        "parent_children/child1.md": "# Child 1",
+        "parent_children/child2.md": "# Child 2",
+        # Should be excluded
+        "parent_children/child_plan.md": "# Plan",
+    })
+    
+    children = solve.get_children(str(tmp_path / "parent.md"))
+    
+    children_dir = tmp_path / "parent_children"
+    assert frozenset(children) == {str(children_dir / "child1.md"), str(children_dir / "child2.md")}
+
+
+@pytest.mark.xfail(raises=AttributeError, strict=True,
+                   reason="solve has no has_children; has_child_or_dependency also checks Dependents")
+def test_has_children(tmp_path):
+    """Test has_children function"""
+    # Task without children
+    task_file = tmp_path / "simple.md"
+    task_file.write_text("# Simple Task")
+    
+    assert not solve.has_children(str(task_file))
+    
+    # Task with children directory
+    complex_file = tmp_path / "complex.md"
+    complex_file.write_text("# Complex Task")
+    
+    children_dir = tmp_path / "complex_children"
+    children_dir.mkdir()
+    (children_dir / "child1.md").write_text("# Child 1")
+    
+    assert solve.has_children(str(complex_file))
+    
+    # Empty children directory
+    empty_file = tmp_path / "empty.md"
+    empty_file.write_text("# Empty Task")
+    
+    empty_children = tmp_path / "empty_children"
+    empty_children.mkdir()
+    
+    assert not solve.has_children(str(empty_file))
+
+
+@pytest.mark.xfail(raises=AttributeError, strict=True,
+                   reason="solve has no generate_tree_context; see test_generate_tree_with_summaries")
+def test_tree_context_generation(task_tree):
+    """Test generate_tree_context function"""
+    root = task_tree / "root.md"
+    grandchild = task_tree / "root_children" / "child1_children" / "grandchild.md"
+    
+    # Test context from different positions
+    context = solve.generate_tree_context(str(root), str(grandchild))
+    
+    # Should contain tree structure
+    assert "Root Task" in context
+    assert "Child 1" in context
+    assert "Child 2" in context
+    assert "Grandchild" in context
+    assert "YOU ARE HERE" in context
+    
+    # Tree markers
+    assert "├──" in context
+    assert "└──" in context
+
+
+def test_generate_tree_with_summaries(task_tree):
+    """Test generate_tree_with_summaries renders the task tree"""
+    child1 = task_tree / "root_children" / "child1.md"
+    
+    tree = solve.generate_tree_with_summaries(task_tree, str(child1))
+    
+    # Plan files and the orphan folder are left out
+    assert tree == "\n".join([
+        f"{task_tree.name}/",
+        '└── root.md - "Root Task"',
+        '    ├── child1.md - "Child 1" [YOU ARE HERE]',
+        '    │   └── grandchild.md - "Grandchild"',
+        '    └── child2.md - "Child 2"',
+    ])
+
+
+def test_tree_missing_root(tmp_path):
+    """Test that a missing workspace root renders as an empty tree"""
+    tree = solve.generate_tree_with_summaries(tmp_path / "gone", str(tmp_path / "gone" / "task.md"))
+    
+    assert tree == "gone/"
+
+
+def test_tree_marks_current_task_through_symlink(tmp_path):
+    """Test that the current task is marked when its folder is a symlink"""
+    workspace = tmp_path / "workspace"
+    write_tree(tmp_path, {
+        "workspace/root.md": "# Root Task",
+        "store/child.md": "# Child",
+    })
+    (workspace / "root_children").symlink_to(tmp_path / "store", target_is_directory=True)
+    
+    for current in (workspace / "root_children" / "child.md", tmp_path / "store" / "child.md"):
+        tree = solve.generate_tree_with_summaries(workspace, str(current))
+        assert '    └── child.md - "Child" [YOU ARE HERE]' in tree.splitlines()
+
+
+@_NO_SOLVE_TASK
+def test_solve_simple_task(tmp_path, fake_run):
+    """Test solving a simple task"""
+    task_file = tmp_path / "simple.md"
+    task_file.write_text(_TASK_MD.format(title="Simple Task", type="simple",
+                                         description="A simple task to solve"))
+    
+    # Set workspace root
+    solve.workspace_root = tmp_path
+    
+    solve.solve_task(str(task_file), str(tmp_path))
+    
+    # Should call Claude once
+    assert len(fake_run.calls) == 1
+    call_args = fake_run.calls[0]
+    
+    # Verify command structure
+    assert call_args[0] == 'claude'
+    assert '--dangerously-skip-permissions' in call_args
+    
+    # Verify prompt
+    prompt = call_args[-1]
+    assert "solve this task" in prompt
+    assert "Simple Task" in prompt
+    
+    # Task should be marked as solved
+    assert str(task_file) in solve.solved_tasks
+
+
+@_NO_SOLVE_TASK
+def test_solve_with_dependencies(tmp_path, fake_run):
+    """Test solving a task with dependencies"""
+    # Create task with dependencies, the dependency and its solution
+    write_tree(tmp_path, {
+        "task.md": """# Main Task
 
 ## Dependencies
 - [Dep Task](dep.md)
 
 ## Description
-Task with dependency""")
-        
-        dep_file = self.test_dir / "dep.md"
-        dep_file.write_text("""# Dep Task
+Task with dependency""",
+        "dep.md": _TASK_MD.format(title="Dep Task", type="simple", description="Dependency task"),
+        "solution.md": "# Solution for Dep Task",
+    })
+    task_file = tmp_path / "task.md"
+    dep_file = tmp_path / "dep.md"
+    
+    # Mark dependency as solved
+    solve.solved_tasks.add(str(dep_file))
+    solve.workspace_root = tmp_path
+    
+    solve.solve_task(str(task_file), str(tmp_path))
+    
+    # Get the prompt
+    prompt = fake_run.calls[-1][-1]
+    
+    # Should include dependent solution
+    assert "Dependent Solutions:" in prompt
+    assert "Solution for Dep Task" in prompt
 
-## Type
-simple
 
-## Description
-Dependency task""")
-        
-        # Create dependency solution
-        dep_solution = self.test_dir / "solution.md"
-        dep_solution.write_text("# Solution for Dep Task")
-        
-        # Mark dependency as solved
-        solve.solved_tasks.add(str(dep_file))
-        solve.workspace_root = self.test_dir
-        
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            with patch('os.chdir'):
-                solve.solve_task(str(task_file), str(self.test_dir))
-                
-                # Get the prompt
-                prompt = mock_run.call_args[0][0][-1]
-                
-                # Should include dependent solution
-                self.assertIn("Dependent Solutions:", prompt)
-                self.assertIn("Solution for Dep Task", prompt)
-    
-    def test_solve_complex_task_decomposition(self):
-        """Test that complex tasks trigger decomposition"""
-        task_file = self.test_dir / "complex.md"
-        task_file.write_text("""# Complex Task
+@_NO_SOLVE_TASK
+def test_solve_complex_task_decomposition(tmp_path, fake_run):
+    """Test that complex tasks trigger decomposition"""
+    task_file = tmp_path / "complex.md"
+    task_file.write_text(_TASK_MD.format(title="Complex Task", type="complex",
+                                         description="This needs decomposition"))
+    
+    solve.workspace_root = tmp_path
+    
+    # Mock decompose subprocess call
+    def mock_decompose(cmd):
+        if 'decompose' in cmd:
+            # Simulate decompose creating children
+            children_dir = tmp_path / "complex_children"
+            children_dir.mkdir()
+            (children_dir / "child.md").write_text("# Child\n\n## Type\nsimple")
+    
+    fake_run.on_call = mock_decompose
+    
+    solve.solve_task(str(task_file), str(tmp_path))
+    
+    # Should call decompose
+    assert any('decompose' in arg for cmd in fake_run.calls for arg in cmd)
 
-## Type
-complex
 
-## Description
-This needs decomposition""")
-        
-        solve.workspace_root = self.test_dir
-        
-        with patch('subprocess.run') as mock_run:
-            # Mock decompose subprocess call
-            def mock_subprocess(cmd, *args, **kwargs):
-                if 'decompose' in cmd:
-                    # Simulate decompose creating children
-                    children_dir = self.test_dir / "complex_children"
-                    children_dir.mkdir()
-                    (children_dir / "child.md").write_text("# Child\n\n## Type\nsimple")
-                return MagicMock(returncode=0)
-            
-            mock_run.side_effect = mock_subprocess
-            
-            with patch('os.chdir'):
-                solve.solve_task(str(task_file), str(self.test_dir))
-                
-                # Should call decompose
-                decompose_calls = [c for c in mock_run.call_args_list 
-                                 if 'decompose' in str(c)]
-                self.assertTrue(len(decompose_calls) > 0)
-    
-    def test_solve_with_plan_update(self):
-        """Test that plan files are updated after solving"""
-        task_file = self.test_dir / "task.md"
-        task_file.write_text("# Task")
-        
-        plan_file = self.test_dir / "task_plan.md"
-        plan_file.write_text("""# Task - Plan
+@pytest.mark.xfail(raises=AttributeError, strict=True,
+                   reason="solve has no update_plan_status; Claude updates the plan file while solving")
+def test_solve_with_plan_update(tmp_path):
+    """Test that plan files are updated after solving"""
+    task_file = tmp_path / "task.md"
+    task_file.write_text("# Task")
+    
+    plan_file = tmp_path / "task_plan.md"
+    plan_file.write_text("""# Task - Plan
 
 ## Status
 [ ] Not started""")
-        
-        solve.workspace_root = self.test_dir
-        solve.solved_tasks.add(str(task_file))
-        
-        # Update plan
-        solve.update_plan_status(str(task_file))
-        
-        # Check plan was updated
-        plan_content = plan_file.read_text()
-        self.assertIn("[x] Completed", plan_content)
-        self.assertNotIn("[ ] Not started", plan_content)
-    
-    def test_solve_entire_tree(self):
-        """Test solve function that orchestrates entire tree solving"""
-        # Create root task
-        root_file = self.test_dir / "root.md"
-        root_file.write_text("# Root Task")
-        
-        # Create plan
-        plan_file = self.test_dir / "root_plan.md"
-        plan_file.write_text("""# Root Task - Plan
+    
+    solve.workspace_root = tmp_path
+    solve.solved_tasks.add(str(task_file))
+    
+    # Update plan
+    solve.update_plan_status(str(task_file))
+    
+    # Check plan was updated
+    plan_content = plan_file.read_text()
+    assert "[x] Completed" in plan_content
+    assert "[ ] Not started" not in plan_content
+
+
+def test_solve_entire_tree(tmp_path, fake_run):
+    """Test solve function that orchestrates entire tree solving"""
+    # Create root task, its plan and two children
+    write_tree(tmp_path, {
+        "root.md": "# Root Task",
+        "root_plan.md": """# Root Task - Plan
 
 ## Type
 complex
@@ -341,108 +381,102 @@ complex
 - [Child 2](root_children/child2.md)
 
 ## Status
-[ ] Not started""")
-        
-        # Create children
-        children_dir = self.test_dir / "root_children"
-        children_dir.mkdir()
-        
-        child1 = children_dir / "child1.md"
-        child1.write_text("""# Child 1
+[ ] Not started""",
+        "root_children/child1.md": _ROOT_CHILD_MD.format(title="Child 1", dependencies="None"),
+        "root_children/child2.md": _ROOT_CHILD_MD.format(title="Child 2",
+                                                         dependencies="- [Child 1](child1.md)"),
+    })
+    root_file = tmp_path / "root.md"
+    
+    solve.solve(str(root_file))
+    
+    # Track solve order
+    solve_order = []
+    for cmd in fake_run.calls:
+        if 'solving a specific task' in cmd[-1]:
+            if "Task content:\n# Child 1" in cmd[-1]:
+                solve_order.append("child1")
+            elif "Task content:\n# Child 2" in cmd[-1]:
+                solve_order.append("child2")
+            elif "Task content:\n# Root Task" in cmd[-1]:
+                solve_order.append("root")
+    
+    # Verify solve order: child1 -> child2 -> root
+    assert solve_order == ["child1", "child2", "root"]
+    
+    # All tasks should be solved
+    assert len(solve.solved_tasks) == 3
 
-## Type
-simple
 
-## Dependencies
-None
+def test_solve_runs_claude_in_task_dir(tmp_path, fake_run):
+    """Test that Claude runs in the directory holding the task file"""
+    write_tree(tmp_path, {"sub/simple.md": _TASK_MD.format(title="Simple Task", type="simple",
+                                                            description="A simple task to solve")})
+    
+    solve.solve(str(tmp_path / "sub" / "simple.md"))
+    
+    assert len(fake_run.calls) == 1
+    assert fake_run.cwds == [os.path.realpath(tmp_path / "sub")]
 
-## Dependents
-- [Root Task](../root.md)""")
-        
-        child2 = children_dir / "child2.md"
-        child2.write_text("""# Child 2
 
-## Type
-simple
+def test_solve_missing_file_raises():
+    """Test that solving a task file that does not exist raises"""
+    with pytest.raises(FileNotFoundError):
+        solve.solve("non_existent.md")
 
-## Dependencies
-- [Child 1](child1.md)
 
-## Dependents
-- [Root Task](../root.md)""")
-        
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            # Track solve order
-            solve_order = []
-            
-            def track_solves(cmd, *args, **kwargs):
-                if 'solve this task' in cmd[-1]:
-                    if "Child 1" in cmd[-1]:
-                        solve_order.append("child1")
-                    elif "Child 2" in cmd[-1]:
-                        solve_order.append("child2")
-                    elif "Root Task" in cmd[-1]:
-                        solve_order.append("root")
-                return MagicMock(returncode=0)
-            
-            mock_run.side_effect = track_solves
-            
-            solve.solve(str(root_file))
-            
-            # Verify solve order: child1 -> child2 -> root
-            self.assertEqual(solve_order, ["child1", "child2", "root"])
-            
-            # All tasks should be solved
-            self.assertEqual(len(solve.solved_tasks), 3)
-    
-    def test_error_handling(self):
-        """Test error handling in solve module"""
-        # Non-existent file
-        with self.assertRaises(FileNotFoundError):
-            solve.solve("non_existent.md")
-        
-        # Claude failure
-        task_file = self.test_dir / "task.md"
-        task_file.write_text("# Task")
-        
-        solve.workspace_root = self.test_dir
-        
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=1)
-            
-            with patch('os.chdir'):
-                with self.assertRaises(SystemExit):
-                    solve.solve_task(str(task_file), str(self.test_dir))
-    
-    def test_cyclic_dependency_detection(self):
-        """Test handling of cyclic dependencies"""
-        # Create tasks with circular dependency
-        task1 = self.test_dir / "task1.md"
-        task1.write_text("""# Task 1
+@_NO_SOLVE_TASK
+def test_error_handling(tmp_path, fake_run):
+    """Test error handling when Claude fails"""
+    task_file = tmp_path / "task.md"
+    task_file.write_text("# Task")
+    
+    solve.workspace_root = tmp_path
+    
+    fake_run.result = _FAIL
+    
+    with pytest.raises(SystemExit):
+        solve.solve_task(str(task_file), str(tmp_path))
+
+
+def test_cyclic_dependency_detection(tmp_path, fake_run):
+    """Test handling of cyclic dependencies"""
+    # Create tasks with circular dependency
+    write_tree(tmp_path, {
+        "task1.md": """# Task 1
 
 ## Dependencies
-- [Task 2](task2.md)""")
-        
-        task2 = self.test_dir / "task2.md"
-        task2.write_text("""# Task 2
+- [Task 2](task2.md)""",
+        "task2.md": """# Task 2
 
 ## Dependencies
-- [Task 1](task1.md)""")
-        
-        # The current implementation might not handle this perfectly,
-        # but it should at least not crash
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=0)
-            
-            try:
-                solve.solve(str(task1))
-                # If it completes, verify no infinite loop
-                self.assertTrue(True)
-            except RecursionError:
-                self.fail("Should handle cyclic dependencies without infinite recursion")
-
-
-if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+- [Task 1](task1.md)""",
+    })
+    task1 = tmp_path / "task1.md"
+    
+    solve.solve(str(task1))
+    
+    # solve only follows Dependents, so the Dependencies cycle is never
+    # walked and only task1 is solved
+    assert len(fake_run.calls) == 1
+
+
+def test_cyclic_dependents(tmp_path, fake_run):
+    """Test that a cycle of dependents solves each task once"""
+    write_tree(tmp_path, {
+        "task1.md": "# Task 1\n\n### Dependents\n- [Task 2](task2.md)\n",
+        "task2.md": "# Task 2\n\n### Dependents\n- [Task 1](task1.md)\n",
+    })
+    
+    # The conftest runs each test from its tmp_path, so this relative path
+    # must still match the resolved paths get_dependent returns
+    solve.solve("task1.md")
+    
+    # task2 is reached through task1 and stops at the cycle back to task1
+    prompts = [cmd[-1] for cmd in fake_run.calls]
+    assert len(prompts) == 2
+    assert "# Task 2" in prompts[0]
+    assert "# Task 1" in prompts[1]
+    assert solve.solving_tasks == set()
+    assert solve.solved_tasks == {os.path.realpath(tmp_path / "task1.md"),
+                                  os.path.realpath(tmp_path / "task2.md")}